@@ -1,10 +1,15 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 from datetime import datetime, timedelta
 from dateutil.relativedelta import relativedelta
-from github import Github
+from github import Github, GithubException
+import requests
+import snowball_kernel
 import io
 import calendar
+import re
+import time
 
 # --- PAGE CONFIGURATION ---
 st.set_page_config(page_title="FedPay Budget Pro", page_icon="💰", layout="wide")
@@ -15,201 +20,270 @@ if "GITHUB_TOKEN" not in st.secrets or "REPO_NAME" not in st.secrets:
     st.info("You need to add GITHUB_TOKEN and REPO_NAME to your Streamlit Cloud Secrets.")
     st.stop()
 
+@st.cache_resource
+def get_repo():
+    # Built once per session/worker and reused across reruns, so widget
+    # interactions don't pay a GitHub round-trip before the UI renders.
+    # per_page=100 keeps root listings to a single page as archives grow
+    g = Github(st.secrets["GITHUB_TOKEN"], per_page=100)
+    return g.get_repo(st.secrets["REPO_NAME"])
+
 try:
-    g = Github(st.secrets["GITHUB_TOKEN"])
-    repo_name = st.secrets["REPO_NAME"]
-    repo = g.get_repo(repo_name)
+    repo = get_repo()
 except Exception as e:
     st.error("⚠️ Security Connection Failed!")
     st.info(f"Error details: {e}")
     st.stop()
 
 # --- HELPER FUNCTIONS ---
+def _with_retries(call, attempts=3, backoff=0.2):
+    """Run a GitHub API call, retrying transient 5xx responses."""
+    for attempt in range(attempts):
+        try:
+            return call()
+        except GithubException as e:
+            if e.status < 500 or attempt == attempts - 1:
+                raise
+            time.sleep(backoff * (attempt + 1))
+
 def save_to_github(filename, content):
     try:
-        try:
-            contents = repo.get_contents(filename)
-            repo.update_file(contents.path, f"Update {filename}", content, contents.sha)
-        except:
-            repo.create_file(filename, f"Create {filename}", content)
+        # Blob SHAs from our own reads/writes let updates skip the
+        # pre-update GET that the Contents API otherwise requires.
+        sha_cache = st.session_state.setdefault('_file_sha', {})
+        known_sha = sha_cache.get(filename) or _root_blob_shas().get(filename)
+        if known_sha is None:
+            try:
+                result = _with_retries(lambda: repo.create_file(filename, f"Create {filename}", content))
+            except GithubException as e:
+                if e.status != 422:
+                    raise
+                # File appeared since the cached tree listing; update instead.
+                result = repo.update_file(filename, f"Update {filename}", content,
+                                          repo.get_contents(filename).sha)
+        else:
+            try:
+                result = _with_retries(lambda: repo.update_file(filename, f"Update {filename}", content, known_sha))
+            except GithubException as e:
+                if e.status != 409:
+                    raise
+                # Cached SHA went stale (file changed upstream); refetch once.
+                result = repo.update_file(filename, f"Update {filename}", content,
+                                          repo.get_contents(filename).sha)
+        sha_cache[filename] = result['content'].sha
+        # A write changes what the cached readers would return.
+        _root_blob_shas.clear()
+        load_from_github.clear()
         return True
     except Exception as e:
         st.error(f"Error saving: {e}")
         return False
 
+@st.cache_data(ttl=300, show_spinner=False)
 def load_from_github(filename):
     try:
-        file_content = repo.get_contents(filename)
-        return pd.read_csv(io.StringIO(file_content.decoded_content.decode()))
-    except:
+        raw = _with_retries(lambda: repo.get_contents(filename)).decoded_content
+        if filename.endswith(".parquet"):
+            return pd.read_parquet(io.BytesIO(raw))
+        # Legacy archives saved before the parquet switch
+        return pd.read_csv(io.StringIO(raw.decode()))
+    except GithubException:
         return None
 
-def get_saved_months():
+_ROOT_TREE_QUERY = """
+{ repository(owner: "%s", name: "%s") {
+    object(expression: "HEAD:") {
+      ... on Tree { entries { name oid type } } } } }
+"""
+
+@st.cache_data(ttl=300)
+def _root_blob_shas():
+    """filename -> blob sha for the repo root, from one request."""
+    # One GraphQL query returns every root entry regardless of count,
+    # where the REST tree/contents listings paginate per 100 files.
+    owner, _, name = repo.full_name.partition("/")
     try:
-        files = repo.get_contents("")
-        saved = [f.name for f in files if f.name.endswith(".csv") and "Budget_" in f.name]
-        return saved
-    except:
-        return []
-
-def load_last_month_data():
-    files = get_saved_months()
-    if not files:
-        return None
-
-    def parse_filename(f):
+        resp = requests.post(
+            "https://api.github.com/graphql",
+            json={"query": _ROOT_TREE_QUERY % (owner, name)},
+            headers={"Authorization": f"bearer {st.secrets['GITHUB_TOKEN']}"},
+            timeout=10,
+        )
+        resp.raise_for_status()
+        entries = resp.json()["data"]["repository"]["object"]["entries"]
+        return {e["name"]: e["oid"] for e in entries if e["type"] == "blob"}
+    except (requests.RequestException, KeyError, TypeError):
+        # GraphQL unavailable (fine-grained tokens, proxies): REST tree
         try:
-            date_str = f.replace("Budget_", "").replace(".csv", "")
-            return datetime.strptime(date_str, "%b_%Y")
-        except:
-            return datetime.min
+            tree = _with_retries(lambda: repo.get_git_tree(repo.default_branch))
+            return {e.path: e.sha for e in tree.tree}
+        except GithubException:
+            return {}
 
-    files.sort(key=parse_filename, reverse=True)
-    latest_file = files[0]
-
-    df = load_from_github(latest_file)
+def get_saved_months():
+    return [p for p in _root_blob_shas()
+            if p.endswith((".parquet", ".csv")) and "Budget_" in p]
+
+# Sort key for Budget_<Mon>_<Year>.{parquet,csv} names: (year, month)
+# integers, no strptime and no locale dependency. Non-conforming names
+# sort last.
+_BUDGET_FILE_RE = re.compile(r"^Budget_([A-Z][a-z]{2})_(\d{4})\.(?:parquet|csv)$")
+_MONTH_NUM = {m: i for i, m in enumerate(calendar.month_abbr) if m}
+
+def _budget_file_key(f):
+    m = _BUDGET_FILE_RE.match(f)
+    if m and m[1] in _MONTH_NUM:
+        # Prefer .parquet when a month was saved in both formats
+        return (int(m[2]), _MONTH_NUM[m[1]], f.endswith(".parquet"))
+    return (0, 0, False)
+
+# Canonical bill columns with their typed defaults
+_BILL_SCHEMA = {'name': '', 'amount': 0.0, 'category': 'OTHER', 'due_day': 1,
+                'frequency': 'Monthly', 'annual_month': 0}
+
+def _normalize_bills_df(df):
+    """Schema-align a bills frame: canonical columns, typed defaults,
+    uppercase categories and stable dtypes."""
+    df = df.reindex(columns=list(_BILL_SCHEMA)).fillna(_BILL_SCHEMA)
+    df['category'] = df['category'].astype(str).str.upper()
+    # frequency comes back as a closed categorical from parquet saves;
+    # keep session frames plain str so the data editor can set new values
+    return df.astype({'name': str, 'frequency': str, 'amount': 'float64',
+                      'due_day': 'int64', 'annual_month': 'int64'})
+
+@st.cache_data(show_spinner=False)
+def _load_normalized(filename, sha):
+    """Parse and schema-normalize one archive. Keyed by (filename, sha) so
+    the cache invalidates exactly when the file changes on GitHub; the
+    parse/dtype work is skipped on every other rerun."""
+    df = load_from_github(filename)
     if df is None:
-        return None
+        # Raise instead of returning: st.cache_data would memoize a None
+        # under this (filename, sha) key forever, and the sha only changes
+        # when the file does -- one transient fetch failure would pin every
+        # later session to the defaults.
+        raise RuntimeError(f"could not load {filename}")
+
+    # pay + income metadata repeats on every row; grab it from the first
+    meta = {}
+    if not df.empty and 'meta_pay_date' in df.columns:
+        first = df.iloc[0].fillna(0)
+        meta = {k: first[k] for k in first.index if k.startswith('meta_')}
 
-    df = df.fillna(0)
+    # One bulk pass: add any missing bill columns and fill gaps with typed
+    # defaults instead of per-column inserts plus a blanket fillna(0).
+    # (Also uppercases mixed-case categories from older saves.)
+    bills = _normalize_bills_df(df)
 
-    if 'frequency' not in df.columns:
-        df['frequency'] = 'Monthly'
-    else:
-        df['frequency'] = df['frequency'].fillna('Monthly')
+    # Consistent sorting
+    return bills.sort_values(by=['due_day', 'name']).reset_index(drop=True), meta
 
-    if 'annual_month' not in df.columns:
-        df['annual_month'] = 0
-    if 'due_day' not in df.columns:
-        df['due_day'] = 1
-    if 'category' not in df.columns:
-        df['category'] = "OTHER"
+def load_last_month_data(files):
+    if not files:
+        return None
 
-    # Consistent sorting
-    df = df.sort_values(by=['due_day', 'name'])
+    latest_file = max(files, key=_budget_file_key)
+    try:
+        bills, meta = _load_normalized(latest_file, _root_blob_shas().get(latest_file, ''))
+    except RuntimeError:
+        return None
 
-    # restore pay + income defaults
-    if not df.empty and 'meta_pay_date' in df.columns:
+    # restore pay + income defaults (session writes stay out of the cache)
+    if meta:
         try:
-            restored_dt = pd.to_datetime(df.iloc[0]['meta_pay_date']).date()
-            st.session_state['restored_date'] = restored_dt
+            st.session_state['restored_date'] = pd.to_datetime(meta['meta_pay_date']).date()
 
-            st.session_state['restored_pay_0'] = float(df.iloc[0].get('meta_inc_pay_0', 2449.0))
-            st.session_state['restored_rent_0'] = float(df.iloc[0].get('meta_inc_rent_0', 0.0))
-            st.session_state['restored_other_0'] = float(df.iloc[0].get('meta_inc_other_0', 0.0))
+            st.session_state['restored_pay_0'] = float(meta.get('meta_inc_pay_0', 2449.0))
+            st.session_state['restored_rent_0'] = float(meta.get('meta_inc_rent_0', 0.0))
+            st.session_state['restored_other_0'] = float(meta.get('meta_inc_other_0', 0.0))
 
-            st.session_state['restored_pay_1'] = float(df.iloc[0].get('meta_inc_pay_1', 2449.0))
-            st.session_state['restored_rent_1'] = float(df.iloc[0].get('meta_inc_rent_1', 0.0))
-        except:
+            st.session_state['restored_pay_1'] = float(meta.get('meta_inc_pay_1', 2449.0))
+            st.session_state['restored_rent_1'] = float(meta.get('meta_inc_rent_1', 0.0))
+        except (KeyError, TypeError, ValueError):
+            # Malformed metadata just means no restored defaults
             pass
 
-    cols_to_keep = ['name', 'amount', 'category', 'due_day', 'frequency', 'annual_month']
-    actual_cols = [c for c in cols_to_keep if c in df.columns]
-    return df[actual_cols].to_dict('records')
+    return bills
 
 # --- DATE HELPERS (FIX BILL ALIGNMENT + INVALID DAYS) ---
-def clamp_day(year: int, month: int, day: int) -> int:
-    last = calendar.monthrange(year, month)[1]
-    return min(day, last)
+_DAYS_IN_MONTH = (0, 31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
 
-def month_keys_in_window(window_start: datetime, window_end: datetime):
+def _last_day_of_month(year: int, month: int) -> int:
+    if month == 2 and (year % 4 == 0 and (year % 100 != 0 or year % 400 == 0)):
+        return 29
+    return _DAYS_IN_MONTH[month]
+
+def month_keys_in_window(window_start, window_end):
     """
     Returns a list of (year, month) pairs that intersect [window_start, window_end).
-    Example: Dec 19 -> Jan 02 returns [(2025, 12), (2026, 1)]
+    Works for date or datetime bounds. Example: Dec 19 -> Jan 02 returns
+    [(2025, 12), (2026, 1)]
     """
-    keys = []
-    cur = datetime(window_start.year, window_start.month, 1)
-    end_month = datetime(window_end.year, window_end.month, 1)
-    while cur <= end_month:
-        keys.append((cur.year, cur.month))
-        cur = cur + relativedelta(months=1)
-    return keys
-
-def bill_due_dates_in_window(bill: dict, window_start: datetime, window_end: datetime):
+    a = window_start.year * 12 + window_start.month - 1
+    b = window_end.year * 12 + window_end.month - 1
+    return [(x // 12, x % 12 + 1) for x in range(a, b + 1)]
+
+def bill_inclusion_matrix(bills_df, windows):
     """
-    Return a sorted list of due datetimes for this bill that fall within [window_start, window_end).
-    This avoids duplicates across adjacent pay periods.
+    Boolean matrix [window][bill]: True where the bill has a due date inside
+    [window_start, window_end). Computed once per rerun with vectorized
+    comparisons instead of per (window, bill) pair inside the render loop.
+    Windows are half-open, so a due date lands in exactly one window.
     """
-    freq = bill.get("frequency", "Monthly")
-    due_day = int(bill.get("due_day", 1))
-    dates = set()
-
-    if freq == "Monthly":
-        for (y, m) in month_keys_in_window(window_start, window_end):
-            d = clamp_day(y, m, due_day)
-            due = datetime(y, m, d)
-            if window_start <= due < window_end:
-                dates.add(due)
-
-    elif freq == "Annual":
-        annual_month = int(bill.get("annual_month", 0) or 0)
-        if 1 <= annual_month <= 12:
-            for y in {window_start.year, window_end.year}:
-                d = clamp_day(y, annual_month, due_day)
-                due = datetime(y, annual_month, d)
-                if window_start <= due < window_end:
-                    dates.add(due)
-        # If annual_month is missing/0, it will not appear until set in the editor.
-
-    elif freq == "Every 2 Weeks":
-        # NOTE: Without an anchor date (next_due_date), we can't place biweekly bills precisely.
-        # Keeping current behavior: include every pay window.
-        dates.add(window_start)
-
-    return sorted(dates)
-
-# --- CALLBACKS ---
-def update_bill_amount(index, key_name):
-    new_value = st.session_state[key_name]
-    st.session_state.bills[index]['amount'] = new_value
-
-def update_bill_day(index, key_name):
-    new_value = st.session_state[key_name]
-    st.session_state.bills[index]['due_day'] = int(new_value)
-
-def update_bill_annual_month(index, key_name):
-    new_value = st.session_state[key_name]
-    st.session_state.bills[index]['annual_month'] = int(new_value)
+    due_days = bills_df['due_day'].to_numpy(dtype=np.int64)
+    freqs = bills_df['frequency'].to_numpy()
+    annual_months = bills_df['annual_month'].to_numpy(dtype=np.int64)
+
+    monthly = freqs == "Monthly"
+    annual = freqs == "Annual"
+    # NOTE: Without an anchor date (next_due_date), we can't place biweekly
+    # bills precisely. Keeping current behavior: include every pay window.
+    biweekly = freqs == "Every 2 Weeks"
+
+    # Clamped due-date ordinals for every month the full span touches,
+    # computed once (windows are contiguous) and shared by all windows.
+    span_start, span_end = windows[0][0], windows[-1][1]
+    month_due_ords = []
+    for (y, m) in month_keys_in_window(span_start, span_end):
+        last = _last_day_of_month(y, m)
+        due_ord = datetime(y, m, 1).toordinal() - 1 + np.minimum(due_days, last)
+        month_due_ords.append((m, due_ord))
+
+    include = np.zeros((len(windows), len(bills_df)), dtype=bool)
+    for w, (window_start, window_end) in enumerate(windows):
+        mask = biweekly.copy()
+        start_ord = window_start.toordinal()
+        end_ord = window_end.toordinal()
+        for m, due_ord in month_due_ords:
+            in_window = (due_ord >= start_ord) & (due_ord < end_ord)
+            mask |= monthly & in_window
+            # Annual bills with annual_month missing/0 never match a real
+            # month, so they won't appear until set in the editor.
+            mask |= annual & (annual_months == m) & in_window
+        include[w] = mask
+    return include
 
 # --- SNOWBALL ENGINE ---
 def calculate_snowball(debts_data, extra_payment):
-    import copy
-    debts = copy.deepcopy(debts_data)
-    debts = sorted(debts, key=lambda x: x['Balance'])
-    schedule = []
-    current_date = datetime.now()
-    months_passed = 0
-
-    while any(d['Balance'] > 0 for d in debts):
-        months_passed += 1
-        current_date += relativedelta(months=1)
-        month_str = current_date.strftime("%b %Y")
-        monthly_budget = extra_payment
-
-        for d in debts:
-            if d['Balance'] > 0:
-                interest = (d['Balance'] * (d['APR'] / 100)) / 12
-                d['Balance'] += interest
-                payment = min(d['Balance'], d['Min Payment'])
-                d['Balance'] -= payment
-                if d['Balance'] <= 0:
-                    monthly_budget += d['Min Payment']
-                    d['Balance'] = 0
-
-        for d in debts:
-            if d['Balance'] > 0:
-                attack_payment = min(d['Balance'], monthly_budget)
-                d['Balance'] -= attack_payment
-                monthly_budget -= attack_payment
-                if monthly_budget <= 0:
-                    break
-
-        total_balance = sum(d['Balance'] for d in debts)
-        schedule.append({"Month": month_str, "Remaining Debt": total_balance})
-        if months_passed > 360:
-            break
-
-    return schedule, current_date
+    # Structure-of-arrays layout: one float64 array per field, sorted
+    # smallest balance first (snowball order). The arrays are fresh copies,
+    # so the caller's dicts are never mutated.
+    order = sorted(range(len(debts_data)), key=lambda i: debts_data[i]['Balance'])
+    balances = np.array([debts_data[i]['Balance'] for i in order], dtype=np.float64)
+    monthly_rate = np.array([debts_data[i]['APR (%)'] for i in order], dtype=np.float64) / 1200.0
+    min_pay = np.array([debts_data[i]['Min Payment'] for i in order], dtype=np.float64)
+
+    # 361 keeps the historical cap: one entry past the 360-month mark.
+    months, remaining = snowball_kernel.run(balances, monthly_rate, min_pay,
+                                            float(extra_payment), 361)
+
+    # One batched label pass instead of strftime per month: periods step by
+    # calendar month exactly like the old relativedelta walk did.
+    now = datetime.now()
+    labels = pd.period_range(now, periods=months + 1, freq='M')[1:].strftime('%b %Y')
+    schedule = [{"Month": labels[k], "Remaining Debt": remaining[k]} for k in range(months)]
+
+    return schedule, now + relativedelta(months=months)
 
 # --- APP NAVIGATION ---
 st.sidebar.title("📅 Budget Timeline")
@@ -224,34 +298,51 @@ if mode == "History Archive":
         if selected_file:
             st.title(f"📂 Archive: {selected_file}")
             df_history = load_from_github(selected_file)
-            st.dataframe(df_history, use_container_width=True)
+            if df_history is not None:
+                # Only the bill columns matter to the reader; the meta_*
+                # income columns would double the Arrow payload for nothing.
+                display_df = df_history[[c for c in _BILL_SCHEMA if c in df_history.columns]].copy()
+                if 'amount' in display_df.columns:
+                    display_df['amount'] = pd.to_numeric(display_df['amount'], downcast='float')
+                st.dataframe(display_df, use_container_width=True, hide_index=True)
             st.stop()
 
 # --- INITIALIZE BILLS ---
-def get_default_bills():
-    return [
-        {"name": "Mortgage", "amount": 1772, "category": "HOUSING", "due_day": 1, "frequency": "Monthly", "annual_month": 0},
-        {"name": "Rent", "amount": 1200, "category": "HOUSING", "due_day": 15, "frequency": "Monthly", "annual_month": 0},
-        {"name": "Electricity", "amount": 346, "category": "HOUSING", "due_day": 12, "frequency": "Monthly", "annual_month": 0},
-        {"name": "Lowes", "amount": 54, "category": "LOANS", "due_day": 20, "frequency": "Monthly", "annual_month": 0},
-        {"name": "AT&T Phone", "amount": 100, "category": "PHONE", "due_day": 26, "frequency": "Monthly", "annual_month": 0},
-        {"name": "AT&T Internet - Home", "amount": 100, "category": "Internet", "due_day": 26, "frequency": "Monthly", "annual_month": 0},
-        {"name": "AT&T Internet - Nick", "amount": 100, "category": "Internet", "due_day": 26, "frequency": "Monthly", "annual_month": 0},
-        {"name": "AT&T Internet", "amount": 36, "category": "ENTERTAINMENT", "due_day": 14, "frequency": "Monthly", "annual_month": 0},
-        {"name": "Klarna", "amount": 108, "category": "LOANS", "due_day": 13, "frequency": "Monthly", "annual_month": 0},
-        {"name": "Avant", "amount": 125, "category": "LOANS", "due_day": 28, "frequency": "Monthly", "annual_month": 0},
-        {"name": "Car Insurance - Me", "amount": 100, "category": "Insurance", "due_day": 26, "frequency": "Monthly", "annual_month": 0},
-        {"name": "Car Insurance - Mom", "amount": 100, "category": "Insurance", "due_day": 26, "frequency": "Monthly", "annual_month": 0},
-        {"name": "Car Insurance - Ny", "amount": 100, "category": "Insurance", "due_day": 26, "frequency": "Monthly", "annual_month": 0},
-    ]
-
-if 'bills' not in st.session_state:
-    last_month = load_last_month_data()
-    if last_month:
-        st.session_state.bills = last_month
+# Categories are always stored uppercase so filters can compare directly
+# (no str().upper() in hot paths).
+CATEGORY_OPTIONS = ["HOUSING", "LOANS", "ENTERTAINMENT", "SAVINGS", "OTHER", "PHONE", "INTERNET", "INSURANCE"]
+FREQ_OPTIONS = ["Monthly", "Every 2 Weeks", "Annual"]
+
+# Fixed at authoring time; get_default_bills hands out fresh copies so
+# session edits never touch the template.
+_DEFAULT_BILLS = (
+    {"name": "Mortgage", "amount": 1772, "category": "HOUSING", "due_day": 1, "frequency": "Monthly", "annual_month": 0},
+    {"name": "Rent", "amount": 1200, "category": "HOUSING", "due_day": 15, "frequency": "Monthly", "annual_month": 0},
+    {"name": "Electricity", "amount": 346, "category": "HOUSING", "due_day": 12, "frequency": "Monthly", "annual_month": 0},
+    {"name": "Lowes", "amount": 54, "category": "LOANS", "due_day": 20, "frequency": "Monthly", "annual_month": 0},
+    {"name": "AT&T Phone", "amount": 100, "category": "PHONE", "due_day": 26, "frequency": "Monthly", "annual_month": 0},
+    {"name": "AT&T Internet - Home", "amount": 100, "category": "INTERNET", "due_day": 26, "frequency": "Monthly", "annual_month": 0},
+    {"name": "AT&T Internet - Nick", "amount": 100, "category": "INTERNET", "due_day": 26, "frequency": "Monthly", "annual_month": 0},
+    {"name": "AT&T Internet", "amount": 36, "category": "ENTERTAINMENT", "due_day": 14, "frequency": "Monthly", "annual_month": 0},
+    {"name": "Klarna", "amount": 108, "category": "LOANS", "due_day": 13, "frequency": "Monthly", "annual_month": 0},
+    {"name": "Avant", "amount": 125, "category": "LOANS", "due_day": 28, "frequency": "Monthly", "annual_month": 0},
+    {"name": "Car Insurance - Me", "amount": 100, "category": "INSURANCE", "due_day": 26, "frequency": "Monthly", "annual_month": 0},
+    {"name": "Car Insurance - Mom", "amount": 100, "category": "INSURANCE", "due_day": 26, "frequency": "Monthly", "annual_month": 0},
+    {"name": "Car Insurance - Ny", "amount": 100, "category": "INSURANCE", "due_day": 26, "frequency": "Monthly", "annual_month": 0},
+)
+
+def get_default_bills_df():
+    return _normalize_bills_df(pd.DataFrame(_DEFAULT_BILLS))
+
+# Bills live in session state as one DataFrame (SoA): window filtering and
+# the editor work on columns directly, and dicts only appear at the edges.
+if 'bills_df' not in st.session_state:
+    last_month = load_last_month_data(saved_files)
+    if last_month is not None and not last_month.empty:
+        st.session_state.bills_df = last_month
         st.toast("✅ Loaded from history!", icon="🔄")
     else:
-        st.session_state.bills = get_default_bills()
+        st.session_state.bills_df = get_default_bills_df()
 
 # --- SNOWBALL UI ---
 if mode == "Debt Snowball Tool ☃️":
@@ -263,11 +354,13 @@ if mode == "Debt Snowball Tool ☃️":
     with col1:
         st.subheader("1. Enter Your Debts")
         if st.button("📥 Import LOANS from Budget"):
-            loans = [b for b in st.session_state.bills if str(b['category']).upper() == "LOANS"]
-            for loan in loans:
-                new_entry = {"Debt Name": loan['name'], "Balance": 0.0, "APR (%)": 0.0, "Min Payment": float(loan['amount'])}
-                if not any(d['Debt Name'] == loan['name'] for d in st.session_state.debt_data):
-                    st.session_state.debt_data.append(new_entry)
+            bills_df = st.session_state.bills_df
+            loans = bills_df.loc[bills_df['category'] == "LOANS", ['name', 'amount']]
+            existing = {d['Debt Name'] for d in st.session_state.debt_data}
+            for name, amount in zip(loans['name'], loans['amount']):
+                if name not in existing:
+                    st.session_state.debt_data.append({"Debt Name": name, "Balance": 0.0, "APR (%)": 0.0, "Min Payment": float(amount)})
+                    existing.add(name)
             st.rerun()
 
         edited_debts = st.data_editor(st.session_state.debt_data, num_rows="dynamic", use_container_width=True, key="debt_editor")
@@ -302,33 +395,35 @@ with st.sidebar:
         with st.form("add_bill_form"):
             new_name = st.text_input("Bill Name")
             new_amount = st.number_input("Amount ($)", min_value=0.0, step=1.0)
-            new_cat = st.selectbox("Category", ["HOUSING", "LOANS", "ENTERTAINMENT", "SAVINGS", "OTHER", "PHONE", "Internet", "Insurance"])
+            new_cat = st.selectbox("Category", CATEGORY_OPTIONS)
             new_day = st.number_input("Due Day", 1, 31, 1)
             freq_val = st.selectbox("Frequency", ["Monthly", "Every 2 Weeks", "Annual"])
             annual_month_val = 0
             if freq_val == "Annual":
-                annual_month_val = st.selectbox("Month Due", range(1, 13), format_func=lambda x: datetime(2023, x, 1).strftime("%B"))
+                annual_month_val = st.selectbox("Month Due", range(1, 13), format_func=calendar.month_name.__getitem__)
             if st.form_submit_button("Add Bill") and new_name:
-                st.session_state.bills.append({
+                # bills_df keeps a clean RangeIndex, so loc[len] appends
+                st.session_state.bills_df.loc[len(st.session_state.bills_df)] = {
                     "name": new_name,
-                    "amount": new_amount,
+                    "amount": float(new_amount),
                     "category": new_cat,
                     "due_day": int(new_day),
                     "frequency": freq_val,
                     "annual_month": int(annual_month_val)
-                })
+                }
                 st.rerun()
 
     with st.expander("🗑️ Delete a Bill"):
-        if st.session_state.bills:
-            to_del = st.selectbox("Select Bill", [b['name'] for b in st.session_state.bills])
+        if not st.session_state.bills_df.empty:
+            to_del = st.selectbox("Select Bill", st.session_state.bills_df['name'].tolist())
             if st.button("❌ Delete"):
-                st.session_state.bills = [b for b in st.session_state.bills if b['name'] != to_del]
+                keep = st.session_state.bills_df['name'] != to_del
+                st.session_state.bills_df = st.session_state.bills_df[keep].reset_index(drop=True)
                 st.rerun()
 
     st.divider()
     if st.button("⚠️ Reset to Defaults"):
-        st.session_state.bills = get_default_bills()
+        st.session_state.bills_df = get_default_bills_df()
         st.rerun()
 
     current_month_name = st.text_input("Month Name", value=datetime.now().strftime("Budget_%b_%Y"))
@@ -340,8 +435,8 @@ with st.sidebar:
     else:
         default_pay_date = datetime.now().date()
 
+    # Stays a plain date: everything downstream only needs .month/.strftime
     pay_date_1 = st.date_input("First Pay Date", default_pay_date)
-    pay_date_1 = datetime.combine(pay_date_1, datetime.min.time())
 
     # CALCULATE PAY DATES
     pay_date_2 = pay_date_1 + timedelta(days=14)
@@ -352,21 +447,34 @@ with st.sidebar:
 
     st.divider()
     if st.button("💾 Save & Close Month"):
-        df_save = pd.DataFrame(st.session_state.bills)
-        df_save = df_save.sort_values(by=['due_day', 'name'])
-
-        df_save['meta_pay_date'] = pay_date_1
+        # Metadata as plain scalars, broadcast into columns in one assign
+        meta = {'meta_pay_date': pay_date_1}
         for i in range(2):
-            df_save[f'meta_inc_pay_{i}'] = st.session_state.get(f'pay_{i}', 2449.0)
+            meta[f'meta_inc_pay_{i}'] = st.session_state.get(f'pay_{i}', 2449.0)
 
             # ✅ Requested: rent defaults to 0.0
-            df_save[f'meta_inc_rent_{i}'] = st.session_state.get(f'rent_{i}', 0.0) if i == 0 else 0
-
-            df_save[f'meta_inc_other_{i}'] = st.session_state.get(f'other_{i}', 0.0)
-
-        filename = f"{current_month_name}.csv"
+            meta[f'meta_inc_rent_{i}'] = st.session_state.get(f'rent_{i}', 0.0) if i == 0 else 0
+
+            meta[f'meta_inc_other_{i}'] = st.session_state.get(f'other_{i}', 0.0)
+
+        df_save = (st.session_state.bills_df
+                   .sort_values(by=['due_day', 'name'])
+                   .assign(**meta))
+
+        # Downcast before serialization: smaller numeric payload, and the
+        # label columns dictionary-encode in parquet. The loader's
+        # _normalize_bills_df restores the working dtypes on read.
+        num_cols = df_save.select_dtypes('number').columns.difference(['due_day', 'annual_month'])
+        df_save[num_cols] = df_save[num_cols].apply(pd.to_numeric, downcast='float')
+        df_save[['due_day', 'annual_month']] = df_save[['due_day', 'annual_month']].astype('int16')
+        df_save[['category', 'frequency']] = df_save[['category', 'frequency']].astype('category')
+
+        # Columnar binary: ~5-10x faster to (de)serialize than CSV and
+        # much smaller on the wire. Old .csv archives stay readable.
+        filename = f"{current_month_name}.parquet"
+        content = df_save.to_parquet(index=False)
         with st.spinner("Saving..."):
-            if save_to_github(filename, df_save.to_csv(index=False)):
+            if save_to_github(filename, content):
                 st.success(f"Saved {filename}!")
                 st.balloons()
 
@@ -374,26 +482,10 @@ with st.sidebar:
 st.title("📊 Current Budget")
 
 # --------- BILL MASTER EDITOR (click-to-edit; change category/frequency without deleting) ----------
-CATEGORY_OPTIONS = ["HOUSING", "LOANS", "ENTERTAINMENT", "SAVINGS", "OTHER", "PHONE", "Internet", "Insurance"]
-FREQ_OPTIONS = ["Monthly", "Every 2 Weeks", "Annual"]
-
 with st.expander("✏️ Edit Bills (No Deleting Needed)", expanded=False):
-    bills_df = pd.DataFrame(st.session_state.bills)
-
-    # Ensure required columns exist
-    for col, default in {
-        "name": "",
-        "amount": 0.0,
-        "category": "OTHER",
-        "due_day": 1,
-        "frequency": "Monthly",
-        "annual_month": 0,
-    }.items():
-        if col not in bills_df.columns:
-            bills_df[col] = default
-
+    prev_bills = st.session_state.bills_df
     edited_df = st.data_editor(
-        bills_df,
+        prev_bills,
         num_rows="dynamic",
         use_container_width=True,
         column_config={
@@ -405,7 +497,7 @@ with st.expander("✏️ Edit Bills (No Deleting Needed)", expanded=False):
             "annual_month": st.column_config.SelectboxColumn(
                 "Annual Month",
                 options=[0] + list(range(1, 13)),
-                format_func=lambda x: "—" if x == 0 else datetime(2023, x, 1).strftime("%b"),
+                format_func=lambda x: "—" if x == 0 else calendar.month_abbr[x],
                 help="Set this only for Annual bills (the month it renews)"
             ),
         },
@@ -416,15 +508,26 @@ with st.expander("✏️ Edit Bills (No Deleting Needed)", expanded=False):
     edited_df["name"] = edited_df["name"].fillna("").astype(str)
     edited_df["due_day"] = edited_df["due_day"].fillna(1).astype(int).clip(1, 31)
     edited_df["amount"] = edited_df["amount"].fillna(0.0).astype(float).clip(lower=0.0)
-    edited_df["category"] = edited_df["category"].fillna("OTHER")
+    edited_df["category"] = edited_df["category"].fillna("OTHER").astype(str).str.upper()
     edited_df["frequency"] = edited_df["frequency"].fillna("Monthly")
     edited_df["annual_month"] = edited_df["annual_month"].fillna(0).astype(int)
 
     # If not Annual, wipe annual_month so it doesn't confuse the logic
     edited_df.loc[edited_df["frequency"] != "Annual", "annual_month"] = 0
 
+    edited_df = edited_df.reset_index(drop=True)
+
+    # Keep a single writer per field: the pay-column widgets are keyed per
+    # bill and their persisted state would win over the frame on this same
+    # rerun, silently undoing editor changes. If the editor touched
+    # anything, drop those keys so the widgets re-seed from the frame.
+    if not edited_df.equals(prev_bills):
+        for idx in range(max(len(edited_df), len(prev_bills))):
+            for key in (f"b_amt_{idx}", f"b_day_{idx}", f"b_mon_{idx}"):
+                st.session_state.pop(key, None)
+
     # Save back to session state
-    st.session_state.bills = edited_df.to_dict("records")
+    st.session_state.bills_df = edited_df
 
     st.caption("Change **Frequency** + **Category** right here. For Annual bills, set **Annual Month** so they show up when due.")
 # -----------------------------------------------------------------------------------------------
@@ -435,27 +538,40 @@ pay_periods = [pay_date_1, pay_date_2]
 if show_3:
     pay_periods.append(pay_date_3)
 
+# PAY WINDOWS: inclusive start, exclusive end
+windows = [(p_date, pay_periods[i + 1] if i + 1 < len(pay_periods) else p_date + timedelta(days=14))
+           for i, p_date in enumerate(pay_periods)]
+
+# Which bills fall in which window, computed once for the whole render
+bills_df = st.session_state.bills_df
+include_matrix = bill_inclusion_matrix(bills_df, windows)
+
+# A bill's editable widgets render once, in the earliest window it falls
+# in; any later window (biweekly bills, mostly) shows it read-only. This
+# halves the widget count in three-pay months and means one widget key
+# per bill instead of one per (bill, column).
+owning_window = include_matrix.argmax(axis=0)
+
+# Income defaults resolved once, outside the widget loop
+# (rent deliberately defaults to 0.0 for every pay period)
+default_incomes = [(st.session_state.get(f'restored_pay_{i}', 2449.0),
+                    st.session_state.get(f'restored_rent_{i}', 0.0),
+                    st.session_state.get(f'restored_other_{i}', 0.0))
+                   for i in range(len(pay_periods))]
+
 # Track displayed bills
 displayed_indices = set()
 
 for i, p_date in enumerate(pay_periods):
     p_num = i + 1
-
-    # PAY WINDOW: inclusive start, exclusive end
-    window_start = p_date
-    if i + 1 < len(pay_periods):
-        window_end = pay_periods[i + 1]
-    else:
-        window_end = p_date + timedelta(days=14)
+    window_start, window_end = windows[i]
 
     with cols[i]:
         st.header(f"Pay #{p_num}")
         st.caption(f"{window_start.strftime('%b %d, %Y')} - {(window_end - timedelta(days=1)).strftime('%b %d, %Y')}")
 
         with st.expander("💸 Income", expanded=False):
-            val_pay = st.session_state.get(f'restored_pay_{i}', 2449.0)
-            val_rent = st.session_state.get(f'restored_rent_{i}', 0.0 if p_num == 1 else 0.0)
-            val_other = st.session_state.get(f'restored_other_{i}', 0.0)
+            val_pay, val_rent, val_other = default_incomes[i]
 
             in_pay = st.number_input("Pay", value=val_pay, step=50.0, key=f"pay_{i}")
             in_rent = st.number_input("Rent", value=val_rent, step=50.0, key=f"rent_{i}")
@@ -466,26 +582,28 @@ for i, p_date in enumerate(pay_periods):
         st.markdown("---")
 
         # Bills due in this window
-        period_bills = []
-        for idx, bill in enumerate(st.session_state.bills):
-            due_dates = bill_due_dates_in_window(bill, window_start, window_end)
-            include = len(due_dates) > 0
-            if include:
-                period_bills.append(idx)
-                displayed_indices.add(idx)
+        period_bills = np.nonzero(include_matrix[i])[0].tolist()
+        displayed_indices.update(period_bills)
 
         total_bills = 0.0
         if not period_bills:
             st.info("No bills due")
         else:
             for idx in period_bills:
-                b = st.session_state.bills[idx]
-                freq = b.get("frequency", "Monthly")
+                # RangeIndex invariant: label == position, so .at is direct
+                freq = bills_df.at[idx, 'frequency']
+
+                if owning_window[idx] != i:
+                    # Editable in its first window; just listed here
+                    amt = float(bills_df.at[idx, 'amount'])
+                    st.write(f"**{bills_df.at[idx, 'name']}** — ${amt:,.2f} (Due {int(bills_df.at[idx, 'due_day'])})")
+                    total_bills += amt
+                    continue
 
-                # Keys
-                k_amt = f"b_amt_{idx}_{p_num}"
-                k_day = f"b_day_{idx}_{p_num}"
-                k_mon = f"b_mon_{idx}_{p_num}"
+                # Keys (one widget per bill, not per bill/column pair)
+                k_amt = f"b_amt_{idx}"
+                k_day = f"b_day_{idx}"
+                k_mon = f"b_mon_{idx}"
 
                 # Layout: Annual bills also show Month selector
                 if freq == "Annual":
@@ -494,45 +612,43 @@ for i, p_date in enumerate(pay_periods):
                     c1, c2 = st.columns([3, 1])
                     c3 = None
 
-                with c1:
-                    st.number_input(
-                        b['name'],
-                        value=float(b.get('amount', 0.0)),
-                        step=1.0,
-                        key=k_amt,
-                        on_change=update_bill_amount,
-                        args=(idx, k_amt)
-                    )
-
-                with c2:
-                    st.number_input(
-                        "Due",
-                        value=int(b.get('due_day', 1)),
-                        min_value=1,
-                        max_value=31,
-                        key=k_day,
-                        on_change=update_bill_day,
-                        args=(idx, k_day)
-                    )
+                # Sync via the returned values: the widget state is current
+                # on this rerun, so no on_change callbacks are needed and the
+                # displayed total is never one event behind.
+                amt = c1.number_input(
+                    bills_df.at[idx, 'name'],
+                    value=float(bills_df.at[idx, 'amount']),
+                    step=1.0,
+                    key=k_amt,
+                )
+
+                day = c2.number_input(
+                    "Due",
+                    value=int(bills_df.at[idx, 'due_day']),
+                    min_value=1,
+                    max_value=31,
+                    key=k_day,
+                )
+
+                bills_df.at[idx, 'amount'] = amt
+                bills_df.at[idx, 'due_day'] = int(day)
 
                 if freq == "Annual" and c3 is not None:
-                    current_val = int(b.get("annual_month", 0) or 0)
+                    current_val = int(bills_df.at[idx, 'annual_month'] or 0)
                     if current_val not in range(1, 13):
                         current_val = window_start.month
-                        st.session_state.bills[idx]["annual_month"] = current_val
-
-                    with c3:
-                        st.selectbox(
-                            "Month",
-                            options=list(range(1, 13)),
-                            index=current_val - 1,
-                            format_func=lambda x: datetime(2023, x, 1).strftime("%b"),
-                            key=k_mon,
-                            on_change=update_bill_annual_month,
-                            args=(idx, k_mon)
-                        )
+                        bills_df.at[idx, 'annual_month'] = current_val
+
+                    mon = c3.selectbox(
+                        "Month",
+                        options=list(range(1, 13)),
+                        index=current_val - 1,
+                        format_func=calendar.month_abbr.__getitem__,
+                        key=k_mon,
+                    )
+                    bills_df.at[idx, 'annual_month'] = int(mon)
 
-                total_bills += float(st.session_state.bills[idx].get('amount', 0.0))
+                total_bills += amt
 
         st.markdown("---")
         res = income - total_bills
@@ -543,13 +659,13 @@ for i, p_date in enumerate(pay_periods):
             st.error(f"**Short:** ${res:,.2f}")
 
 # --- WARNING FOR ORPHANED BILLS ---
-missing_indices = [i for i in range(len(st.session_state.bills)) if i not in displayed_indices]
+missing_indices = sorted(set(range(len(bills_df))) - displayed_indices)
 if missing_indices:
     st.divider()
     st.warning("⚠️ The following bills are not visible in any column:")
     for idx in missing_indices:
-        b = st.session_state.bills[idx]
-        st.write(f"- **{b.get('name','')}** (Due Day: {b.get('due_day')}, Frequency: {b.get('frequency','Monthly')}, Category: {b.get('category','OTHER')})")
-        if b.get("frequency") == "Annual" and int(b.get("annual_month", 0) or 0) not in range(1, 13):
+        b = bills_df.iloc[idx]
+        st.write(f"- **{b['name']}** (Due Day: {b['due_day']}, Frequency: {b['frequency']}, Category: {b['category']})")
+        if b['frequency'] == "Annual" and int(b['annual_month'] or 0) not in range(1, 13):
             st.write("  ↳ ⚠️ Annual bill missing Month (set Annual Month in the Edit Bills table)")
     st.caption("Tip: This view only shows the current pay windows. Advance First Pay Date to see future bills.")
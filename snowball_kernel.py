@@ -0,0 +1,90 @@
+"""Compiled debt-snowball simulation kernel.
+
+Lives in its own module so numba's on-disk cache (cache=True) survives
+edits to app.py and Streamlit's per-session re-imports stay cheap.
+"""
+import math
+
+import numpy as np
+from numba import njit
+
+
+@njit(cache=True)
+def run(balances, monthly_rate, min_pay, extra_payment, max_months):
+    # Pure-numeric month loop compiled to machine code. Arrays arrive
+    # sorted in snowball order; the kernel mutates balances in place and
+    # returns (months simulated, remaining total per month).
+    n = balances.shape[0]
+    remaining = np.empty(max_months, dtype=np.float64)
+    months = 0
+
+    while months < max_months:
+        total = 0.0
+        for i in range(n):
+            total += balances[i]
+        if total <= 0.0:
+            break
+
+        if extra_payment <= 0.0:
+            # Minimums-only regime: between payoffs every debt amortizes
+            # independently, so solve n = -log(1 - r*B/P) / log(1+r) for the
+            # months until the next payoff event and burn through the
+            # intervening months without the payoff/snowball bookkeeping.
+            n_min = max_months + 1
+            for i in range(n):
+                b = balances[i]
+                if b > 0.0:
+                    r = monthly_rate[i]
+                    p = min_pay[i]
+                    if p <= 0.0 or (r > 0.0 and 1.0 - r * b / p <= 0.0):
+                        continue  # never pays off at minimums
+                    if r <= 0.0:
+                        n_i = int(math.ceil(b / p))
+                    else:
+                        n_i = int(math.ceil(-math.log(1.0 - r * b / p) / math.log(1.0 + r)))
+                    if n_i < n_min:
+                        n_min = n_i
+            steps = n_min - 1
+            room = max_months - months
+            if steps > room:
+                steps = room
+            if steps > 0:
+                for k in range(steps):
+                    total = 0.0
+                    for i in range(n):
+                        if balances[i] > 0.0:
+                            balances[i] = balances[i] * (1.0 + monthly_rate[i]) - min_pay[i]
+                        if balances[i] > 0.0:
+                            total += balances[i]
+                    remaining[months + k] = total
+                months += steps
+                continue
+
+        months += 1
+        monthly_budget = extra_payment
+
+        # Minimum-payment pass
+        for i in range(n):
+            if balances[i] > 0.0:
+                balances[i] *= 1.0 + monthly_rate[i]
+                payment = min(balances[i], min_pay[i])
+                balances[i] -= payment
+                if balances[i] <= 0.0:
+                    monthly_budget += min_pay[i]
+                    balances[i] = 0.0
+
+        # Snowball pass: extra budget drains sequentially, smallest first
+        for i in range(n):
+            if balances[i] > 0.0:
+                attack_payment = min(balances[i], monthly_budget)
+                balances[i] -= attack_payment
+                monthly_budget -= attack_payment
+                if monthly_budget <= 0.0:
+                    break
+
+        total = 0.0
+        for i in range(n):
+            total += balances[i]
+        remaining[months - 1] = total
+
+    return months, remaining